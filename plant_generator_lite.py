@@ -14,7 +14,20 @@ import bpy
 import bmesh # Blenderのメッシュ編集に非常に便利
 import numpy as np
 import math
-from mathutils import Vector, Matrix, Quaternion # Blenderの数学ユーティリティ
+import re
+from collections import Counter
+from mathutils import Vector # Blenderの数学ユーティリティ
+
+
+# 展開後のL-System文字列の長さの上限 (これを超えると展開前に中止する)
+LSYSTEM_MAX_COMMANDS = 10_000_000
+
+# L-Systemのルール1つ分 ("記号:置換後の文字列"、前後の空白は無視する)
+_RULE_PATTERN = re.compile(r"\s*([^:]*?)\s*:\s*(.*?)\s*", re.DOTALL)
+
+# 作成済みのアイコスフィアのメッシュ名 ((分割数, 半径) → メッシュ名)
+# Undoやファイルの読み込みでデータブロックは作り直されるため、参照ではなく名前で覚えておく
+_ICO_CACHE = {}
 
 
 # --- 新機能：L-Systemプリセットが変更されたときにパラメータを更新するコールバック関数 ---
@@ -46,6 +59,464 @@ def update_lsystem_preset(self, context):
     # 'CUSTOM' が選択された場合は何もしない。ユーザーが自由に変更するため。
 
 
+# --- 0. 数値計算のヘルパー (オペレータはこれらの結果をBlenderへ渡すだけにする) ---
+try:
+    from numba import njit
+    HAS_NUMBA = True
+except ImportError: # Blender同梱のPythonには通常numbaは入っていない
+    HAS_NUMBA = False
+
+    def njit(*args, **kwargs):
+        """numbaが無い環境では関数をそのまま返すデコレータ"""
+        if args and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+
+def fill_mesh_from_arrays(mesh, verts, edges=None, quads=None):
+    """NumPy配列の頂点・辺・四角形面を foreach_set でメッシュへ一括コピーする"""
+    mesh.vertices.add(len(verts))
+    mesh.vertices.foreach_set("co", verts.ravel())
+
+    if edges is not None and len(edges) > 0:
+        mesh.edges.add(len(edges))
+        mesh.edges.foreach_set("vertices", edges.ravel())
+
+    has_faces = quads is not None and len(quads) > 0
+    if has_faces:
+        mesh.loops.add(quads.size)
+        mesh.loops.foreach_set("vertex_index", quads.ravel())
+        mesh.polygons.add(len(quads))
+        mesh.polygons.foreach_set("loop_start", np.arange(0, quads.size, 4, dtype=np.int32))
+        if bpy.app.version < (4, 0, 0): # Blender 4.0以降は loop_total が読み取り専用
+            mesh.polygons.foreach_set("loop_total", np.full(len(quads), 4, dtype=np.int32))
+
+    # 面の辺は calc_edges で自動的に追加される
+    mesh.update(calc_edges=has_faces)
+
+
+def rotation_matrices_to_quaternions(matrices):
+    """(N, 3, 3) の回転行列をまとめて (N, 4) のクォータニオン (w, x, y, z) に変換する"""
+    m = np.asarray(matrices, dtype=np.float64)
+    m00, m01, m02 = m[:, 0, 0], m[:, 0, 1], m[:, 0, 2]
+    m10, m11, m12 = m[:, 1, 0], m[:, 1, 1], m[:, 1, 2]
+    m20, m21, m22 = m[:, 2, 0], m[:, 2, 1], m[:, 2, 2]
+
+    # 数値的に安定させるため、最も大きい成分を基準に計算する (Shepperdの方法)
+    diagonals = np.stack((m00 + m11 + m22, m00 - m11 - m22, m11 - m00 - m22, m22 - m00 - m11), axis=1)
+    largest = np.argmax(diagonals, axis=1)
+    s = 2.0 * np.sqrt(np.maximum(1.0 + diagonals[np.arange(len(m)), largest], 1e-12))
+
+    quats = np.empty((len(m), 4))
+    case = largest == 0
+    quats[case] = np.stack((s / 4.0, (m21 - m12) / s, (m02 - m20) / s, (m10 - m01) / s), axis=1)[case]
+    case = largest == 1
+    quats[case] = np.stack(((m21 - m12) / s, s / 4.0, (m01 + m10) / s, (m02 + m20) / s), axis=1)[case]
+    case = largest == 2
+    quats[case] = np.stack(((m02 - m20) / s, (m01 + m10) / s, s / 4.0, (m12 + m21) / s), axis=1)[case]
+    case = largest == 3
+    quats[case] = np.stack(((m10 - m01) / s, (m02 + m20) / s, (m12 + m21) / s, s / 4.0), axis=1)[case]
+    return quats
+
+
+# 黄金角 (ラジアン)
+GOLDEN_ANGLE_RAD = math.pi * (3.0 - math.sqrt(5.0))
+
+
+def vogel_coords(num_points, scaling_factor_c, z_offset, z_factor_curvature):
+    """Vogelモデルの全ての点をNumPyで一度に計算し、(座標, 角度, 半径) を返す"""
+    indices = np.arange(num_points, dtype=np.float64)
+    sqrt_n = np.sqrt(indices)
+    theta = indices * GOLDEN_ANGLE_RAD
+    radius = scaling_factor_c * sqrt_n
+
+    coords = np.empty((num_points, 3), dtype=np.float32)
+    coords[:, 0] = radius * np.cos(theta)
+    coords[:, 1] = radius * np.sin(theta)
+    coords[:, 2] = z_offset * sqrt_n + z_factor_curvature * radius * radius
+    return coords, theta, radius
+
+
+def vogel_leaf_rotations(theta, radius, orientation_mode, tilt_factor):
+    """葉の向き (クォータニオン w, x, y, z) を全ての点についてまとめて計算する"""
+    # Assumes leaf instance model has its "forward" along its local Y-axis,
+    # and its "up" along its local Z-axis.
+    # Default rotation makes the leaf's local Y-axis point along World +Z (upwards):
+    # a 90-degree rotation around the World X-axis.
+    rotations = np.empty((len(theta), 4))
+    rotations[:] = (math.cos(math.pi / 4.0), math.sin(math.pi / 4.0), 0.0, 0.0)
+
+    if orientation_mode == 'NORMAL':
+        # tilt_factor: 0 means leaf Y-axis aligns with the radial direction (horizontal)
+        #              1 means leaf Y-axis aligns with World Z (vertical)
+        # Vector.to_track_quat('Y', 'Z') of the tilted radial direction is a tilt of
+        # 'elevation' around X followed by a turn of (theta - 90°) around Z,
+        # so the quaternion can be written in closed form without mathutils.
+        elevation = math.atan2(tilt_factor, 1.0 - tilt_factor)
+        cos_tilt, sin_tilt = math.cos(elevation / 2.0), math.sin(elevation / 2.0)
+        half_yaw = (theta - math.pi / 2.0) / 2.0
+        cos_yaw, sin_yaw = np.cos(half_yaw), np.sin(half_yaw)
+
+        # The exact center keeps the upward rotation.
+        off_center = radius > 0.0001
+        rotations[off_center, 0] = (cos_yaw * cos_tilt)[off_center]
+        rotations[off_center, 1] = (cos_yaw * sin_tilt)[off_center]
+        rotations[off_center, 2] = (sin_yaw * sin_tilt)[off_center]
+        rotations[off_center, 3] = (sin_yaw * cos_tilt)[off_center]
+
+    return rotations
+
+
+def vogel_leaf_eulers(theta, radius, orientation_mode, tilt_factor):
+    """vogel_leaf_rotations と同じ向きをオイラー角 (XYZ) で返す (ジオメトリノードの属性用)"""
+    # Blender's XYZ Euler applies X first, then Z, which matches the tilt-then-turn
+    # closed form used in vogel_leaf_rotations.
+    eulers = np.zeros((len(theta), 3), dtype=np.float32)
+    eulers[:, 0] = math.pi / 2.0
+
+    if orientation_mode == 'NORMAL':
+        off_center = radius > 0.0001
+        eulers[off_center, 0] = math.atan2(tilt_factor, 1.0 - tilt_factor)
+        eulers[off_center, 2] = theta[off_center] - math.pi / 2.0
+
+    return eulers
+
+
+def parse_lsystem_rules(rules_input):
+    """カンマ区切りのルール文字列を dict に変換する (書式が正しくない場合は ValueError)"""
+    rule_pairs = [r for r in rules_input.split(',') if r.strip()]
+    if not rule_pairs:
+        raise ValueError("Rules cannot be empty.")
+
+    rules_dict = {}
+    for pair in rule_pairs:
+        match = _RULE_PATTERN.fullmatch(pair)
+        if match is None:
+            raise ValueError(f"Rule '{pair.strip()}' format incorrect. Use 'Symbol:Replacement'.")
+        rules_dict[match.group(1)] = match.group(2)
+    return rules_dict
+
+
+def compile_rules_table(char_rules):
+    """ord() の値で直接引ける256要素の変換テーブルを作る (dictのハッシュ引きを避ける)"""
+    if any(ord(key) >= 256 for key in char_rules):
+        # Latin-1の範囲外のシンボルがある場合は通常のdictのテーブルを使う
+        return str.maketrans(char_rules)
+
+    # 範囲外の文字は IndexError となり、translate はその文字をそのまま残す
+    table = [chr(code) for code in range(256)]
+    for key, value in char_rules.items():
+        table[ord(key)] = value
+    return table
+
+
+def count_lsystem_symbols(axiom, char_rules, iterations):
+    """文字列を展開せずに、展開後の各シンボルの出現数だけを計算する"""
+    # 出現数のベクトルは 公理の出現数 × (生成行列)^iterations で求まる
+    alphabet = sorted(set(axiom).union(char_rules, *char_rules.values()))
+    if not alphabet:
+        return Counter()
+    index = {symbol: i for i, symbol in enumerate(alphabet)}
+
+    # Pythonの整数 (object) で計算して、反復回数が大きくても桁あふれさせない
+    production = np.zeros((len(alphabet), len(alphabet)), dtype=object)
+    for i, symbol in enumerate(alphabet):
+        if symbol in char_rules:
+            for produced, count in Counter(char_rules[symbol]).items():
+                production[i, index[produced]] = count
+        else:
+            production[i, i] = 1 # ルールの無いシンボルはそのまま残る
+
+    initial = np.zeros(len(alphabet), dtype=object)
+    for symbol, count in Counter(axiom).items():
+        initial[index[symbol]] = count
+
+    final = initial @ np.linalg.matrix_power(production, iterations)
+    return Counter({symbol: count for symbol, count in zip(alphabet, final.tolist()) if count})
+
+
+def expand_lsystem(axiom, char_rules, iterations):
+    """1文字単位のルールを iterations 回適用した文字列を返す"""
+    # str.translate は1文字ずつの置換をCのループで一括処理する
+    rules_table = compile_rules_table(char_rules)
+    ls_string = axiom
+    for _ in range(iterations):
+        ls_string = ls_string.translate(rules_table)
+    return ls_string
+
+
+# タートルのコマンドコード (文字列は uint8 の配列に変換してから解釈する)
+TURTLE_COMMANDS = {"F": 0, "G": 1, "+": 2, "-": 3, "&": 4, "^": 5, "\\": 6, "/": 7, "[": 8, "]": 9}
+CMD_LEAF = 10
+CMD_NONE = 255
+
+
+def encode_turtle_commands(ls_string, leaf_symbol=""):
+    """L-System文字列をコマンドコードの配列に変換する (コマンドでない文字は CMD_NONE)"""
+    # 葉のシンボルは他のコマンドと重ならない1文字の場合だけ有効
+    use_leaf = len(leaf_symbol) == 1 and leaf_symbol not in TURTLE_COMMANDS
+
+    try:
+        byte_codes = np.frombuffer(ls_string.encode("latin-1"), dtype=np.uint8)
+    except UnicodeEncodeError:
+        byte_codes = None
+
+    if byte_codes is not None:
+        # 1文字1バイトで表せる場合は、256要素の表で全ての文字を一度に変換する
+        lookup = np.full(256, CMD_NONE, dtype=np.uint8)
+        for symbol, code in TURTLE_COMMANDS.items():
+            lookup[ord(symbol)] = code
+        if use_leaf and ord(leaf_symbol) < 256:
+            lookup[ord(leaf_symbol)] = CMD_LEAF
+        return lookup[byte_codes]
+
+    code_points = np.frombuffer(ls_string.encode("utf-32-le"), dtype=np.uint32)
+    commands = np.full(len(code_points), CMD_NONE, dtype=np.uint8)
+    for symbol, code in TURTLE_COMMANDS.items():
+        commands[code_points == ord(symbol)] = code
+    if use_leaf:
+        commands[code_points == ord(leaf_symbol)] = CMD_LEAF
+    return commands
+
+
+@njit(cache=True)
+def _rotate_about_axis(vx, vy, vz, kx, ky, kz, s, c):
+    """ロドリゲスの回転公式で (vx, vy, vz) を単位ベクトル k の周りに回転する"""
+    dot = (kx * vx + ky * vy + kz * vz) * (1.0 - c)
+    return (vx * c + (ky * vz - kz * vy) * s + kx * dot,
+            vy * c + (kz * vx - kx * vz) * s + ky * dot,
+            vz * c + (kx * vy - ky * vx) * s + kz * dot)
+
+
+@njit(cache=True)
+def _run_turtle_kernel(commands, angle_rad, length, heading, up, left):
+    """コマンドコードの配列を解釈する (戻り値は run_turtle と同じ)"""
+    # 事前に1回走査して、出力と状態スタックの大きさを求める
+    num_verts = 0
+    num_edges = 0
+    num_leaves = 0
+    depth = 0
+    max_depth = 1
+    for i in range(len(commands)):
+        command = commands[i]
+        if command == 0:
+            num_verts += 2
+            num_edges += 1
+        elif command == 1:
+            num_verts += 2
+        elif command == 8:
+            depth += 1
+            if depth > max_depth:
+                max_depth = depth
+        elif command == 9:
+            if depth > 0:
+                depth -= 1
+        elif command == CMD_LEAF:
+            num_leaves += 1
+
+    verts = np.empty((num_verts, 3), dtype=np.float32)
+    edges = np.empty((num_edges, 2), dtype=np.int32)
+    leaf_frames = np.empty((num_leaves, 4, 3), dtype=np.float64)
+    stack = np.empty((max_depth, 12), dtype=np.float64)
+
+    px, py, pz = 0.0, 0.0, 0.0
+    hx, hy, hz = heading[0], heading[1], heading[2]
+    ux, uy, uz = up[0], up[1], up[2]
+    lx, ly, lz = left[0], left[1], left[2]
+    s = math.sin(angle_rad)
+    c = math.cos(angle_rad)
+
+    vert_index = 0
+    edge_index = 0
+    leaf_index = 0
+    sp = 0
+    unbalanced_pops = 0
+
+    for i in range(len(commands)):
+        command = commands[i]
+        if command == 0 or command == 1: # F, G
+            verts[vert_index, 0] = px
+            verts[vert_index, 1] = py
+            verts[vert_index, 2] = pz
+            px += hx * length
+            py += hy * length
+            pz += hz * length
+            verts[vert_index + 1, 0] = px
+            verts[vert_index + 1, 1] = py
+            verts[vert_index + 1, 2] = pz
+            if command == 0:
+                edges[edge_index, 0] = vert_index
+                edges[edge_index, 1] = vert_index + 1
+                edge_index += 1
+            vert_index += 2
+        elif command == 2 or command == 3: # +, - (Uの周りに回転)
+            sign = s if command == 2 else -s
+            hx, hy, hz = _rotate_about_axis(hx, hy, hz, ux, uy, uz, sign, c)
+            lx, ly, lz = _rotate_about_axis(lx, ly, lz, ux, uy, uz, sign, c)
+        elif command == 4 or command == 5: # &, ^ (Lの周りに回転)
+            sign = s if command == 4 else -s
+            hx, hy, hz = _rotate_about_axis(hx, hy, hz, lx, ly, lz, sign, c)
+            ux, uy, uz = _rotate_about_axis(ux, uy, uz, lx, ly, lz, sign, c)
+        elif command == 6 or command == 7: # \, / (Hの周りに回転)
+            sign = s if command == 6 else -s
+            ux, uy, uz = _rotate_about_axis(ux, uy, uz, hx, hy, hz, sign, c)
+            lx, ly, lz = _rotate_about_axis(lx, ly, lz, hx, hy, hz, sign, c)
+        elif command == 8: # [
+            stack[sp, 0] = px
+            stack[sp, 1] = py
+            stack[sp, 2] = pz
+            stack[sp, 3] = hx
+            stack[sp, 4] = hy
+            stack[sp, 5] = hz
+            stack[sp, 6] = ux
+            stack[sp, 7] = uy
+            stack[sp, 8] = uz
+            stack[sp, 9] = lx
+            stack[sp, 10] = ly
+            stack[sp, 11] = lz
+            sp += 1
+        elif command == 9: # ]
+            if sp > 0:
+                sp -= 1
+                px, py, pz = stack[sp, 0], stack[sp, 1], stack[sp, 2]
+                hx, hy, hz = stack[sp, 3], stack[sp, 4], stack[sp, 5]
+                ux, uy, uz = stack[sp, 6], stack[sp, 7], stack[sp, 8]
+                lx, ly, lz = stack[sp, 9], stack[sp, 10], stack[sp, 11]
+            else:
+                unbalanced_pops += 1
+        elif command == CMD_LEAF:
+            leaf_frames[leaf_index, 0, 0] = px
+            leaf_frames[leaf_index, 0, 1] = py
+            leaf_frames[leaf_index, 0, 2] = pz
+            leaf_frames[leaf_index, 1, 0] = lx
+            leaf_frames[leaf_index, 1, 1] = ly
+            leaf_frames[leaf_index, 1, 2] = lz
+            leaf_frames[leaf_index, 2, 0] = hx
+            leaf_frames[leaf_index, 2, 1] = hy
+            leaf_frames[leaf_index, 2, 2] = hz
+            leaf_frames[leaf_index, 3, 0] = ux
+            leaf_frames[leaf_index, 3, 1] = uy
+            leaf_frames[leaf_index, 3, 2] = uz
+            leaf_index += 1
+
+    return verts, edges, leaf_frames, unbalanced_pops
+
+
+def _run_turtle_python(ls_string, angle_rad, length, heading, up, left, leaf_symbol):
+    """_run_turtle_kernel と同じ処理のPython版 (numbaが無い環境ではこちらの方が速い)"""
+    # コマンドでない文字 (X など) は elif を全て素通りするだけなので、ループの前に translate で取り除く
+    known_symbols = set(TURTLE_COMMANDS)
+    if leaf_symbol:
+        known_symbols.add(leaf_symbol)
+    unknown_symbols = set(ls_string) - known_symbols
+    if unknown_symbols:
+        ls_string = ls_string.translate(dict.fromkeys(map(ord, unknown_symbols)))
+
+    # 頂点・辺の配列は事前に確保する (str.count はCで数えるので安い)
+    num_edges = ls_string.count("F")
+    verts = np.empty((2 * (num_edges + ls_string.count("G")), 3), dtype=np.float32)
+    edges = np.empty((num_edges, 2), dtype=np.int32)
+    vert_index = 0
+    edge_index = 0
+    # 葉の座標系 (位置, L, H, U) も葉のシンボルの数だけ確保しておく
+    leaf_frames = np.empty((ls_string.count(leaf_symbol) if leaf_symbol else 0, 4, 3), dtype=np.float64)
+    leaf_index = 0
+    unbalanced_pops = 0
+
+    # mathutilsのオブジェクトを作らないよう、状態は全てfloatのローカル変数で持つ
+    px, py, pz = 0.0, 0.0, 0.0
+    hx, hy, hz = heading
+    ux, uy, uz = up
+    lx, ly, lz = left
+
+    # 回転角は一定なので sin/cos はループの外で一度だけ計算する (ロドリゲスの回転公式)
+    sin_a = math.sin(angle_rad)
+    cos_a = math.cos(angle_rad)
+    one_minus_cos = 1.0 - cos_a
+
+    # 分岐スタックは12個のfloatを1つのタプルにまとめて積む (dictやベクトルのコピーを作らない)
+    stack = []
+
+    for command in ls_string:
+        if command == "F" or command == "G":
+            verts[vert_index] = (px, py, pz)
+            px += hx * length
+            py += hy * length
+            pz += hz * length
+            verts[vert_index + 1] = (px, py, pz)
+            if command == "F":
+                edges[edge_index] = (vert_index, vert_index + 1)
+                edge_index += 1
+            vert_index += 2
+
+        elif command == "+" or command == "-":
+            # H と L を U の周りに回転
+            s = sin_a if command == "+" else -sin_a
+            d = (ux * hx + uy * hy + uz * hz) * one_minus_cos
+            hx, hy, hz = (hx * cos_a + (uy * hz - uz * hy) * s + ux * d,
+                          hy * cos_a + (uz * hx - ux * hz) * s + uy * d,
+                          hz * cos_a + (ux * hy - uy * hx) * s + uz * d)
+            d = (ux * lx + uy * ly + uz * lz) * one_minus_cos
+            lx, ly, lz = (lx * cos_a + (uy * lz - uz * ly) * s + ux * d,
+                          ly * cos_a + (uz * lx - ux * lz) * s + uy * d,
+                          lz * cos_a + (ux * ly - uy * lx) * s + uz * d)
+
+        elif command == "&" or command == "^":
+            # H と U を L の周りに回転
+            s = sin_a if command == "&" else -sin_a
+            d = (lx * hx + ly * hy + lz * hz) * one_minus_cos
+            hx, hy, hz = (hx * cos_a + (ly * hz - lz * hy) * s + lx * d,
+                          hy * cos_a + (lz * hx - lx * hz) * s + ly * d,
+                          hz * cos_a + (lx * hy - ly * hx) * s + lz * d)
+            d = (lx * ux + ly * uy + lz * uz) * one_minus_cos
+            ux, uy, uz = (ux * cos_a + (ly * uz - lz * uy) * s + lx * d,
+                          uy * cos_a + (lz * ux - lx * uz) * s + ly * d,
+                          uz * cos_a + (lx * uy - ly * ux) * s + lz * d)
+
+        elif command == "\\" or command == "/":
+            # U と L を H の周りに回転
+            s = sin_a if command == "\\" else -sin_a
+            d = (hx * ux + hy * uy + hz * uz) * one_minus_cos
+            ux, uy, uz = (ux * cos_a + (hy * uz - hz * uy) * s + hx * d,
+                          uy * cos_a + (hz * ux - hx * uz) * s + hy * d,
+                          uz * cos_a + (hx * uy - hy * ux) * s + hz * d)
+            d = (hx * lx + hy * ly + hz * lz) * one_minus_cos
+            lx, ly, lz = (lx * cos_a + (hy * lz - hz * ly) * s + hx * d,
+                          ly * cos_a + (hz * lx - hx * lz) * s + hy * d,
+                          lz * cos_a + (hx * ly - hy * lx) * s + hz * d)
+
+        elif command == "[":
+            stack.append((px, py, pz, hx, hy, hz, ux, uy, uz, lx, ly, lz))
+        elif command == "]":
+            if stack:
+                px, py, pz, hx, hy, hz, ux, uy, uz, lx, ly, lz = stack.pop()
+            else:
+                unbalanced_pops += 1
+
+        elif command == leaf_symbol:
+            leaf_frames[leaf_index] = ((px, py, pz), (lx, ly, lz), (hx, hy, hz), (ux, uy, uz))
+            leaf_index += 1
+
+    return verts[:vert_index], edges[:edge_index], leaf_frames[:leaf_index], unbalanced_pops
+
+
+def run_turtle(ls_string, angle_rad, length, heading, up, left, leaf_symbol=None):
+    """L-System文字列をタートルで解釈し、(頂点, 辺, 葉の座標系, 対応の無い']'の数) を返す
+
+    葉の座標系は (位置, L, H, U) を並べた (M, 4, 3) の配列。
+    numbaがあればコンパイル済みのカーネルを、無ければPython版を使う。
+    """
+    if HAS_NUMBA:
+        commands = encode_turtle_commands(ls_string, leaf_symbol or "")
+        return _run_turtle_kernel(
+            commands, angle_rad, length,
+            np.asarray(heading, dtype=np.float64),
+            np.asarray(up, dtype=np.float64),
+            np.asarray(left, dtype=np.float64),
+        )
+    return _run_turtle_python(ls_string, angle_rad, length, heading, up, left, leaf_symbol)
+
+
 # --- 1. Property Groups (UIで使うパラメータ) ---
 class VogelProperties(bpy.types.PropertyGroup):
     num_points: bpy.props.IntProperty(
@@ -93,6 +564,21 @@ class VogelProperties(bpy.types.PropertyGroup):
         description="Scale of the instanced object",
         default=0.1, min=0.001, max=10.0
     )
+    make_unique_mesh: bpy.props.BoolProperty(
+        name="Make Unique Mesh",
+        description="Give every instance its own copy of the mesh data instead of sharing the source object's mesh (uses much more memory)",
+        default=False
+    )
+    use_vertex_instancing: bpy.props.BoolProperty(
+        name="Instance on Vertices",
+        description="Generate a single point-cloud object that instances the icosphere/custom object on its points, instead of one object per point (custom objects keep their per-point orientation through Geometry Nodes)",
+        default=False
+    )
+    update_existing: bpy.props.BoolProperty(
+        name="Update Existing Object",
+        description="Rebuild the mesh of the existing 'VogelPatternObject' in place instead of adding a new object on every run",
+        default=False
+    )
     # align_to_normal は leaf_orientation_mode に置き換えられました
     # align_to_normal: bpy.props.BoolProperty(
     #     name="Align to Normal/Center",
@@ -181,81 +667,127 @@ class LSystemProperties(bpy.types.PropertyGroup):
         description="Scale of the generated/instanced leaf",
         default=0.1, min=0.01, max=2.0
     )
+    make_unique_leaf_mesh: bpy.props.BoolProperty(
+        name="Make Unique Leaf Mesh",
+        description="Give every leaf its own copy of the leaf object's mesh data instead of sharing it (uses much more memory)",
+        default=False
+    )
+    update_existing: bpy.props.BoolProperty(
+        name="Update Existing Object",
+        description="Rebuild the mesh of the existing 'LSystemPlant' in place instead of adding a new object on every run (leaf objects are parented to it and replaced on every run)",
+        default=False
+    )
 
 
 # --- 2. Operators (実際の処理) ---
 
+def get_output_object(context, object_name, mesh_name, update_existing):
+    """生成結果を入れるオブジェクトを返す (update_existing なら同名の既存オブジェクトのメッシュを空にして使い回す)"""
+    obj = bpy.data.objects.get(object_name) if update_existing else None
+    if obj is not None and obj.type == 'MESH' and obj.library is None:
+        if obj.data.users > 1:
+            # リンク複製 (Alt+D) などと共有しているメッシュは消さず、このオブジェクトだけ新しいメッシュにする
+            obj.data = bpy.data.meshes.new(mesh_name)
+        else:
+            # データブロックを作り直さないので、再実行のたびにメッシュが増えていかない
+            obj.data.clear_geometry()
+        if context.scene.objects.get(obj.name) is None:
+            context.collection.objects.link(obj)
+        return obj
+
+    mesh = bpy.data.meshes.new(mesh_name)
+    obj = bpy.data.objects.new(object_name, mesh)
+    context.collection.objects.link(obj)
+    return obj
+
+
+def remove_generated_leaves(plant_obj):
+    """前回の実行で plant_obj の子として作った葉のオブジェクトを削除する"""
+    if plant_obj is None or plant_obj.library is not None:
+        return
+    for leaf_obj in [child for child in plant_obj.children if child.get("plant_gen_leaf")]:
+        leaf_data = leaf_obj.data
+        bpy.data.objects.remove(leaf_obj)
+        # 葉ごとに複製したメッシュは、使われなくなったら一緒に消す
+        if isinstance(leaf_data, bpy.types.Mesh) and leaf_data.users == 0:
+            bpy.data.meshes.remove(leaf_data)
+
+
 # Vogelのモデル生成オペレータ
 class VOGEL_OT_Generate(bpy.types.Operator):
     bl_idname = "plant_gen.vogel_generate"
     bl_label = "Generate Vogel Pattern"
     bl_options = {'REGISTER', 'UNDO'}
 
-    def execute(self, context):
-        props = context.scene.vogel_props
-        
-        golden_angle_rad = math.pi * (3.0 - math.sqrt(5.0))
-        
-        generated_objects = [] # 生成されたオブジェクトを追跡
+    def create_icosphere_mesh(self, props):
+        """全ての点で共有するアイコスフィアのメッシュを返す (同じ大きさなら前回のものを再利用する)"""
+        subdivisions = 2
+        key = (subdivisions, props.point_size)
+        tag = f"{subdivisions}:{props.point_size!r}"
 
-        # 頂点のみのメッシュを生成する場合の頂点リスト
-        verts_only_list = []
+        # 名前が残っていても、別のメッシュに置き換わっていないかタグで確認する
+        ico_mesh = bpy.data.meshes.get(_ICO_CACHE.get(key, ""))
+        if ico_mesh is not None and ico_mesh.get("plant_gen_icosphere") == tag:
+            return ico_mesh
 
-        for n in range(props.num_points):
-            theta = n * golden_angle_rad
-            radius_xy = props.scaling_factor_c * math.sqrt(n)
-            x = radius_xy * math.cos(theta)
-            y = radius_xy * math.sin(theta)
-            z_calc = props.z_offset * math.sqrt(n) + props.z_factor_curvature * (radius_xy**2)
-            current_pos = Vector((x, y, z_calc))
+        ico_mesh = bpy.data.meshes.new(name="VogelPointSphere")
+        bm = bmesh.new()
+        bmesh.ops.create_icosphere(bm, subdivisions=subdivisions, radius=props.point_size)
+        bm.to_mesh(ico_mesh)
+        bm.free()
+        ico_mesh["plant_gen_icosphere"] = tag
 
-            if props.use_custom_instance_object and props.instance_object:
-                source_obj = props.instance_object
-                
-                new_obj = source_obj.copy()
-                if source_obj.data:
-                    new_obj.data = source_obj.data.copy()
-                new_obj.animation_data_clear()
-                context.collection.objects.link(new_obj)
-                
+        _ICO_CACHE[key] = ico_mesh.name
+        return ico_mesh
+
+    def create_vertex_object(self, context, coords):
+        """頂点のみのメッシュを持つオブジェクトを1つ作る"""
+        props = context.scene.vogel_props
+        obj = get_output_object(context, "VogelPatternObject", "VogelPatternVertices", props.update_existing)
+        # from_pydataを使わず、float32の配列をそのままBlenderの頂点配列へ一括コピー
+        fill_mesh_from_arrays(obj.data, coords)
+        return [obj]
+
+    def create_point_objects(self, context, coords, ico_mesh, rotations):
+        """点ごとにアイコスフィアかカスタムオブジェクトのリンク複製を作る"""
+        props = context.scene.vogel_props
+        generated_objects = []
+
+        if ico_mesh is not None:
+            for current_pos in coords.tolist():
+                ico_obj = bpy.data.objects.new("VogelPoint", ico_mesh)
+                ico_obj.location = current_pos
+                generated_objects.append(ico_obj)
+        else:
+            source_obj = props.instance_object
+            instance_name = source_obj.name + ".inst"
+            # データを持たないオブジェクト (コレクションをインスタンスするEmptyなど) や
+            # オブジェクトにリンクされたマテリアル、モディファイア、コンストレイントは
+            # objects.new では引き継げないので copy() を使う
+            use_copy = (source_obj.data is None
+                        or any(slot.link == 'OBJECT' for slot in source_obj.material_slots)
+                        or len(source_obj.modifiers) > 0
+                        or len(source_obj.constraints) > 0)
+            has_animation = source_obj.animation_data is not None
+            for current_pos, rotation in zip(coords.tolist(), rotations.tolist()):
+                if use_copy:
+                    new_obj = source_obj.copy()
+                    if props.make_unique_mesh and source_obj.data:
+                        new_obj.data = source_obj.data.copy()
+                    if has_animation:
+                        new_obj.animation_data_clear()
+                else:
+                    # 複製の必要なものが無いので、データだけを共有する軽い新しいオブジェクトを作る
+                    instance_data = source_obj.data
+                    if props.make_unique_mesh:
+                        instance_data = instance_data.copy()
+                    new_obj = bpy.data.objects.new(instance_name, instance_data)
                 new_obj.location = current_pos
                 new_obj.scale = (props.instance_scale, props.instance_scale, props.instance_scale)
 
                 # --- 葉の向きを制御 ---
                 new_obj.rotation_mode = 'QUATERNION'
-
-                # Assumes leaf instance model has its "forward" along its local Y-axis,
-                # and its "up" along its local Z-axis.
-
-                # Default rotation to make the leaf's local Y-axis point along World +Z (upwards).
-                # This is a 90-degree rotation around the World X-axis.
-                rot_y_to_world_z = Quaternion((1.0, 0.0, 0.0), math.radians(90.0))
-
-                if props.leaf_orientation_mode == 'UPWARD':
-                    new_obj.rotation_quaternion = rot_y_to_world_z
-                
-                elif props.leaf_orientation_mode == 'NORMAL':
-                    if radius_xy > 0.0001: # Not at the exact center
-                        # Direction from center in XY plane (horizontal component of normal)
-                        radial_dir_xy = Vector((x, y, 0.0)).normalized()
-                        world_z_axis = Vector((0.0, 0.0, 1.0))
-                        
-                        # tilt_factor: 0 means leaf Y-axis aligns with radial_dir_xy (horizontal)
-                        #              1 means leaf Y-axis aligns with world_z_axis (vertical)
-                        tilt_factor = props.leaf_upward_tilt_angle / 90.0
-                        
-                        # Calculate the target direction for the leaf's local Y-axis
-                        target_y_direction = radial_dir_xy.lerp(world_z_axis, tilt_factor).normalized()
-                        
-                        # Align leaf's local Y to target_y_direction, and local Z to World Z.
-                        # to_track_quat('Y', 'Z') does this:
-                        # - Rotates so local Y points along the vector it's called on (target_y_direction).
-                        # - Rotates so local Z points along World Z as much as possible.
-                        final_rotation = target_y_direction.to_track_quat('Y', 'Z')
-                        new_obj.rotation_quaternion = final_rotation
-                    else: # At the exact center
-                        # For the center point, make the leaf's Y-axis point upwards.
-                        new_obj.rotation_quaternion = rot_y_to_world_z
+                new_obj.rotation_quaternion = rotation
                 
                 # The original object's (instance_object) rotation is NOT applied here by default.
                 # The generated rotation is considered absolute for the instance.
@@ -263,35 +795,129 @@ class VOGEL_OT_Generate(bpy.types.Operator):
                 # new_obj.rotation_quaternion @= props.instance_object.rotation_euler.to_quaternion()
                 generated_objects.append(new_obj)
 
-            elif props.use_icospheres:
-                ico_mesh = bpy.data.meshes.new(name="VogelPointSphere")
-                bm = bmesh.new()
-                bmesh.ops.create_icosphere(bm, subdivisions=2, radius=props.point_size)
-                bm.to_mesh(ico_mesh)
-                bm.free()
-                
-                ico_obj = bpy.data.objects.new("VogelPoint", ico_mesh)
-                ico_obj.location = current_pos
-                context.collection.objects.link(ico_obj)
-                generated_objects.append(ico_obj)
+        # シーンに繋がっていない新しいコレクションへまとめてリンクし、
+        # 最後にそのコレクションだけをシーンへ繋ぐ (シーンの更新は1回で済む)
+        points_collection = bpy.data.collections.new("VogelPoints")
+        collection_objects = points_collection.objects
+        for obj in generated_objects:
+            collection_objects.link(obj)
+        context.collection.children.link(points_collection)
+
+        return generated_objects
+
+    def create_vertex_instancer(self, context, coords, ico_mesh):
+        """点群メッシュ1つの頂点上にアイコスフィアを複製表示する (N個のオブジェクトを作らない)"""
+        points_mesh = bpy.data.meshes.new(name="VogelPatternPoints")
+        fill_mesh_from_arrays(points_mesh, coords)
+
+        instancer_obj = bpy.data.objects.new("VogelPatternInstancer", points_mesh)
+        instancer_obj.instance_type = 'VERTS'
+        context.collection.objects.link(instancer_obj)
+
+        # 子オブジェクトの位置は頂点の位置で置き換えられるため、原点に置いておく
+        template_obj = bpy.data.objects.new("VogelPoint", ico_mesh)
+        template_obj.parent = instancer_obj
+        context.collection.objects.link(template_obj)
+
+        return [instancer_obj, template_obj]
+
+    def create_instance_node_group(self, instance_obj, instance_scale):
+        """点の 'rotation' 属性を使って instance_obj を各点に配置するジオメトリノードを作る"""
+        node_group = bpy.data.node_groups.new("VogelInstanceOnPoints", 'GeometryNodeTree')
+        if bpy.app.version >= (4, 0, 0): # Blender 4.0以降はソケットを interface で定義する
+            node_group.interface.new_socket("Geometry", in_out='INPUT', socket_type='NodeSocketGeometry')
+            node_group.interface.new_socket("Geometry", in_out='OUTPUT', socket_type='NodeSocketGeometry')
+        else:
+            node_group.inputs.new('NodeSocketGeometry', "Geometry")
+            node_group.outputs.new('NodeSocketGeometry', "Geometry")
+
+        nodes = node_group.nodes
+        group_input = nodes.new('NodeGroupInput')
+        group_output = nodes.new('NodeGroupOutput')
+
+        object_info = nodes.new('GeometryNodeObjectInfo')
+        object_info.inputs["Object"].default_value = instance_obj
+        object_info.inputs["As Instance"].default_value = True
+
+        rotation_attr = nodes.new('GeometryNodeInputNamedAttribute')
+        rotation_attr.data_type = 'FLOAT_VECTOR'
+        rotation_attr.inputs["Name"].default_value = "rotation"
+        # Blender 3.x では型ごとに出力ソケットがあるので、有効になっているものを使う
+        rotation_output = next(socket for socket in rotation_attr.outputs if socket.enabled)
+
+        instance_on_points = nodes.new('GeometryNodeInstanceOnPoints')
+        instance_on_points.inputs["Scale"].default_value = (instance_scale, instance_scale, instance_scale)
+
+        links = node_group.links
+        links.new(group_input.outputs[0], instance_on_points.inputs["Points"])
+        links.new(object_info.outputs["Geometry"], instance_on_points.inputs["Instance"])
+        links.new(rotation_output, instance_on_points.inputs["Rotation"])
+        links.new(instance_on_points.outputs["Instances"], group_output.inputs[0])
+
+        group_input.location = (-400.0, 0.0)
+        object_info.location = (-400.0, -150.0)
+        rotation_attr.location = (-400.0, -400.0)
+        group_output.location = (200.0, 0.0)
+        return node_group
+
+    def create_node_instancer(self, context, coords, eulers):
+        """点群メッシュ1つに Instance on Points のモディファイアを付け、点ごとの向きでカスタムオブジェクトを配置する"""
+        props = context.scene.vogel_props
+
+        points_mesh = bpy.data.meshes.new(name="VogelPatternPoints")
+        fill_mesh_from_arrays(points_mesh, coords)
+        # 各点の回転はオイラー角の属性としてメッシュに持たせる
+        rotation_attr = points_mesh.attributes.new("rotation", 'FLOAT_VECTOR', 'POINT')
+        rotation_attr.data.foreach_set("vector", eulers.ravel())
+
+        instancer_obj = bpy.data.objects.new("VogelPatternInstancer", points_mesh)
+        modifier = instancer_obj.modifiers.new("VogelInstances", 'NODES')
+        modifier.node_group = self.create_instance_node_group(props.instance_object, props.instance_scale)
+        context.collection.objects.link(instancer_obj)
+
+        return [instancer_obj]
+
+    def execute(self, context):
+        props = context.scene.vogel_props
+
+        # 全ての点の座標をNumPyで一度だけ計算する (Pythonのループでmath関数を呼ばない)
+        num_points = props.num_points
+        coords, theta_all, radius_all = vogel_coords(
+            num_points, props.scaling_factor_c, props.z_offset, props.z_factor_curvature)
+
+        # 座標を計算した後は、3つのモードでオブジェクトの作り方だけを切り替える
+        use_custom = bool(props.use_custom_instance_object and props.instance_object)
+        use_instancer = props.use_vertex_instancing and (use_custom or props.use_icospheres)
+        if use_instancer and use_custom and bpy.app.version < (3, 2, 0):
+            # Named Attribute ノードは Blender 3.2 以降にしか無いので、点ごとのオブジェクトで作る
+            self.report({'WARNING'}, "Instancing custom objects requires Blender 3.2 or later; generating one object per point instead.")
+            use_instancer = False
+
+        if not use_custom and not props.use_icospheres:
+            generated_objects = self.create_vertex_object(context, coords)
+        else:
+            ico_mesh = None if use_custom else self.create_icosphere_mesh(props)
+            if use_instancer and use_custom:
+                eulers = vogel_leaf_eulers(
+                    theta_all, radius_all, props.leaf_orientation_mode, props.leaf_upward_tilt_angle / 90.0)
+                generated_objects = self.create_node_instancer(context, coords, eulers)
+            elif use_instancer:
+                generated_objects = self.create_vertex_instancer(context, coords, ico_mesh)
             else:
-                # 頂点のみを生成する場合は、ループの最後にまとめて処理
-                verts_only_list.append(current_pos)
-
-        # 頂点のみのメッシュ生成をループの外で実行
-        if verts_only_list:
-            mesh = bpy.data.meshes.new(name="VogelPatternVertices")
-            mesh.from_pydata(verts_only_list, [], [])
-            mesh.update()
-            obj = bpy.data.objects.new("VogelPatternObject", mesh)
-            context.collection.objects.link(obj)
-            generated_objects.append(obj)
+                rotations = None
+                if use_custom:
+                    rotations = vogel_leaf_rotations(
+                        theta_all, radius_all, props.leaf_orientation_mode, props.leaf_upward_tilt_angle / 90.0)
+                generated_objects = self.create_point_objects(context, coords, ico_mesh, rotations)
 
         if not generated_objects:
             self.report({'WARNING'}, "No objects were generated.")
             return {'CANCELLED'}
 
-        self.report({'INFO'}, f"{len(generated_objects)} elements generated for Vogel pattern.")
+        if use_instancer:
+            self.report({'INFO'}, f"{num_points} points instanced for Vogel pattern.")
+        else:
+            self.report({'INFO'}, f"{len(generated_objects)} elements generated for Vogel pattern.")
         return {'FINISHED'}
 
 # L-システムの植物生成オペレータ
@@ -300,153 +926,114 @@ class LSYSTEM_OT_Generate(bpy.types.Operator):
     bl_label = "Generate L-System Plant"
     bl_options = {'REGISTER', 'UNDO'}
 
-    def apply_rules_lsystem(self, current_string, rules_dict):
-        new_string = []
-        for char in current_string:
-            new_string.append(rules_dict.get(char, char))
-        return "".join(new_string)
+    # 解析済みのルール (rules_input の文字列 → rules_dict)。Redoパネルでの再実行では解析を省く
+    _parse_cache = {}
 
     def execute(self, context):
         props = context.scene.lsystem_props
 
         # --- 新機能：複数ルールに対応したパーサー ---
-        rules_dict = {}
-        # カンマ(,)で各ルール定義を分割
-        rule_pairs = [r.strip() for r in props.rules_input.split(',') if r.strip()]
-
-        if not rule_pairs:
-            self.report({'ERROR'}, "Rules cannot be empty.")
-            return {'CANCELLED'}
-
-        for pair in rule_pairs:
-            if ':' in pair:
-                key, value = pair.split(':', 1)
-                rules_dict[key.strip()] = value.strip()
-            else:
-                self.report({'ERROR'}, f"Rule '{pair}' format incorrect. Use 'Symbol:Replacement'.")
+        rules_dict = self._parse_cache.get(props.rules_input)
+        if rules_dict is None:
+            try:
+                rules_dict = parse_lsystem_rules(props.rules_input)
+            except ValueError as error:
+                self.report({'ERROR'}, str(error))
                 return {'CANCELLED'}
+            if len(self._parse_cache) >= 32: # 入力を編集するたびに増えるので、溜まったら捨てる
+                self._parse_cache.clear()
+            self._parse_cache[props.rules_input] = rules_dict
 
         if not rules_dict:
             self.report({'ERROR'}, "No valid rules parsed.")
             return {'CANCELLED'}
         
-        # L-システムの文字列を展開
-        current_ls_string = props.axiom
-        for _ in range(props.iterations):
-            current_ls_string = self.apply_rules_lsystem(current_ls_string, rules_dict)
+        # 置換は1文字単位なので、1文字のシンボルのルールだけを使う
+        char_rules = {key: value for key, value in rules_dict.items() if len(key) == 1}
 
-        bm = bmesh.new()
+        # 展開後の長さはシンボルの出現数から正確に分かるので、大きすぎる場合は展開前に中止する
+        symbol_counts = count_lsystem_symbols(props.axiom, char_rules, props.iterations)
+        expanded_length = sum(symbol_counts.values())
+        if expanded_length > LSYSTEM_MAX_COMMANDS:
+            self.report({'ERROR'}, f"L-System would expand to {expanded_length:,} commands (limit {LSYSTEM_MAX_COMMANDS:,}). Reduce iterations or simplify the rules.")
+            return {'CANCELLED'}
+
+        # L-システムの文字列を展開
+        current_ls_string = expand_lsystem(props.axiom, char_rules, props.iterations)
 
-        position = Vector((0.0, 0.0, 0.0))
         heading_vec = Vector(props.initial_direction).normalized()
-        
-        if abs(heading_vec.dot(Vector((0,0,1)))) < 0.99:
-            left_vec = heading_vec.cross(Vector((0,0,1))).normalized()
-            up_vec = left_vec.cross(heading_vec).normalized()
-        else:
-            left_vec = heading_vec.cross(Vector((0,1,0))).normalized()
-            up_vec = left_vec.cross(heading_vec).normalized()
-
-        stack = []
-        angle_rad = math.radians(props.angle)
-
-        for command in current_ls_string:
-            if command == "F" or command == "G":
-                start_pos_vert = bm.verts.new(position.copy())
-                position += heading_vec * props.length
-                end_pos_vert = bm.verts.new(position.copy())
-                if command == "F":
-                    bm.edges.new((start_pos_vert, end_pos_vert))
-
-            elif command == "+":
-                rot_quat = Quaternion(up_vec, angle_rad)
-                heading_vec.rotate(rot_quat)
-                left_vec.rotate(rot_quat)
-                
-            elif command == "-":
-                rot_quat = Quaternion(up_vec, -angle_rad)
-                heading_vec.rotate(rot_quat)
-                left_vec.rotate(rot_quat)
-
-            elif command == "&":
-                rot_quat = Quaternion(left_vec, angle_rad)
-                heading_vec.rotate(rot_quat)
-                up_vec.rotate(rot_quat)
-
-            elif command == "^":
-                rot_quat = Quaternion(left_vec, -angle_rad)
-                heading_vec.rotate(rot_quat)
-                up_vec.rotate(rot_quat)
-
-            elif command == "\\":
-                rot_quat = Quaternion(heading_vec, angle_rad)
-                up_vec.rotate(rot_quat)
-                left_vec.rotate(rot_quat)
-
-            elif command == "/":
-                rot_quat = Quaternion(heading_vec, -angle_rad)
-                up_vec.rotate(rot_quat)
-                left_vec.rotate(rot_quat)
-
-            elif command == "[":
-                stack.append({
-                    'pos': position.copy(),
-                    'H': heading_vec.copy(),
-                    'U': up_vec.copy(),
-                    'L': left_vec.copy(),
-                })
-            elif command == "]":
-                if stack:
-                    data = stack.pop()
-                    position = data['pos']
-                    heading_vec = data['H']
-                    up_vec = data['U']
-                    left_vec = data['L']
-                else:
-                    self.report({'WARNING'}, "L-System stack empty, unbalanced ']'")
-            
-            elif props.add_leaves and command == props.leaf_symbol:
-                if props.leaf_object:
-                    leaf_obj_instance = bpy.data.objects.new(name=f"Leaf_{props.leaf_object.name}", object_data=props.leaf_object.data.copy())
-                    context.collection.objects.link(leaf_obj_instance)
-                    leaf_obj_instance.location = position.copy()
-                    
-                    rot_matrix = Matrix((left_vec, heading_vec, up_vec)).transposed()
-                    leaf_obj_instance.rotation_mode = 'QUATERNION'
-                    leaf_obj_instance.rotation_quaternion = rot_matrix.to_quaternion()
-                    leaf_obj_instance.scale = (props.leaf_scale, props.leaf_scale, props.leaf_scale)
-                else:
-                    leaf_bm = bmesh.new()
-                    v1 = leaf_bm.verts.new((-0.5 * props.leaf_scale, 0, 0))
-                    v2 = leaf_bm.verts.new(( 0.5 * props.leaf_scale, 0, 0))
-                    v3 = leaf_bm.verts.new(( 0.5 * props.leaf_scale, 1.0 * props.leaf_scale, 0))
-                    v4 = leaf_bm.verts.new((-0.5 * props.leaf_scale, 1.0 * props.leaf_scale, 0))
-                    leaf_bm.faces.new((v1, v2, v3, v4))
-                    
-                    transform_matrix = Matrix.Translation(position) @ Matrix((left_vec, heading_vec, up_vec)).transposed().to_4x4()
-
-                    temp_leaf_verts = []
-                    for v_idx in leaf_bm.verts:
-                        v_world = transform_matrix @ v_idx.co
-                        temp_leaf_verts.append(bm.verts.new(v_world))
-                    
-                    if len(temp_leaf_verts) == 4:
-                        try:
-                            bm.faces.new(temp_leaf_verts)
-                        except ValueError:
-                            pass # Avoids error with degenerate faces if any
-                    leaf_bm.free()
-
-        if len(bm.verts) > 0:
-            mesh_data = bpy.data.meshes.new("LSystemMesh")
-            bm.to_mesh(mesh_data)
-            bm.free()
-
-            obj = bpy.data.objects.new("LSystemPlant", mesh_data)
-            context.collection.objects.link(obj)
+
+        # 進行方向とほぼ平行にならない基準軸 (通常はZ、真上/真下を向くときはY) から直交基底を作る
+        reference_axis = Vector((0.0, 0.0, 1.0)) if abs(heading_vec.z) < 0.99 else Vector((0.0, 1.0, 0.0))
+        left_vec = heading_vec.cross(reference_axis).normalized()
+        up_vec = left_vec.cross(heading_vec).normalized()
+
+        # タートルで文字列を解釈し、頂点・辺の配列と葉の位置・向きを得る
+        verts, edges, leaf_frames, unbalanced_pops = run_turtle(
+            current_ls_string, math.radians(props.angle), props.length,
+            tuple(heading_vec), tuple(up_vec), tuple(left_vec),
+            props.leaf_symbol if props.add_leaves else None,
+        )
+
+        if unbalanced_pops:
+            self.report({'WARNING'}, f"L-System stack empty, unbalanced ']' ({unbalanced_pops} times)")
+
+        # --- 葉の配置 ---
+        # 葉の四角形はローカル座標のテンプレートを一度だけ作り、各葉の座標系 (L, H, U) で変換する
+        leaf_template = np.array([
+            (-0.5, 0.0, 0.0),
+            ( 0.5, 0.0, 0.0),
+            ( 0.5, 1.0, 0.0),
+            (-0.5, 1.0, 0.0),
+        ]) * props.leaf_scale
+
+        # 既存のオブジェクトを更新する場合は、前回作った葉のオブジェクトを先に取り除く
+        if props.update_existing:
+            remove_generated_leaves(bpy.data.objects.get("LSystemPlant"))
+
+        leaf_quad_verts = None
+        leaf_objects = []
+        if props.leaf_object:
+            # 葉の座標系 (L, H, U を列とする回転行列) から全ての葉の回転をまとめて求める
+            leaf_rotations = rotation_matrices_to_quaternions(leaf_frames[:, 1:].transpose(0, 2, 1))
+            for position, rotation in zip(leaf_frames[:, 0].tolist(), leaf_rotations.tolist()):
+                # 既定ではメッシュデータを全ての葉で共有する (リンク複製)
+                leaf_data = props.leaf_object.data.copy() if props.make_unique_leaf_mesh else props.leaf_object.data
+                leaf_obj_instance = bpy.data.objects.new(name=f"Leaf_{props.leaf_object.name}", object_data=leaf_data)
+                leaf_objects.append(leaf_obj_instance)
+                leaf_obj_instance.location = position
+                leaf_obj_instance.rotation_mode = 'QUATERNION'
+                leaf_obj_instance.rotation_quaternion = rotation
+                leaf_obj_instance.scale = (props.leaf_scale, props.leaf_scale, props.leaf_scale)
+        elif len(leaf_frames) > 0:
+            # frame[1:] は (L, H, U) を行に持つので、全ての葉についてテンプレートに右から掛ける
+            leaf_quad_verts = np.einsum('vj,mji->mvi', leaf_template, leaf_frames[:, 1:]) + leaf_frames[:, :1]
+
+        # 葉の四角形は本体の頂点の後ろに追加する
+        quads = None
+        if leaf_quad_verts is not None:
+            first_leaf_vert = len(verts)
+            verts = np.concatenate([verts, leaf_quad_verts.reshape(-1, 3)]).astype(np.float32)
+            quads = np.arange(first_leaf_vert, len(verts), dtype=np.int32).reshape(-1, 4)
+
+        # 既存のオブジェクトを更新する場合は、葉だけでも次の実行で置き換えられるように本体を用意する
+        obj = None
+        if len(verts) > 0 or (props.update_existing and leaf_objects):
+            obj = get_output_object(context, "LSystemPlant", "LSystemMesh", props.update_existing)
+            fill_mesh_from_arrays(obj.data, verts, edges, quads)
+
+        # 葉のオブジェクトはループの後にまとめてリンクする
+        # 既存のオブジェクトを更新する場合は本体の子にして、次の実行で削除できるよう印を付ける
+        collection_objects = context.collection.objects
+        for leaf_obj_instance in leaf_objects:
+            if props.update_existing:
+                leaf_obj_instance.parent = obj
+                leaf_obj_instance["plant_gen_leaf"] = True
+            collection_objects.link(leaf_obj_instance)
+
+        if len(verts) > 0:
             self.report({'INFO'}, f"L-System plant generated with {len(current_ls_string)} commands.")
         else:
-            bm.free()
             self.report({'WARNING'}, "L-System resulted in no geometry.")
 
         return {'FINISHED'}
@@ -476,6 +1063,8 @@ class PLANTGEN_PT_MainPanel(bpy.types.Panel):
         if v_props.use_custom_instance_object:
             box_vogel.prop(v_props, "instance_object")
             box_vogel.prop(v_props, "instance_scale")
+            if not v_props.use_vertex_instancing:
+                box_vogel.prop(v_props, "make_unique_mesh")
             box_vogel.prop(v_props, "leaf_orientation_mode")
             if v_props.leaf_orientation_mode == 'NORMAL':
                 box_vogel.prop(v_props, "leaf_upward_tilt_angle")
@@ -484,6 +1073,14 @@ class PLANTGEN_PT_MainPanel(bpy.types.Panel):
             if v_props.use_icospheres:
                 box_vogel.prop(v_props, "point_size")
 
+        # 頂点のみのオブジェクトを作る場合 (カスタムオブジェクトが未設定の場合も含む) だけ表示する
+        use_custom = v_props.use_custom_instance_object and v_props.instance_object
+        if not use_custom and not v_props.use_icospheres:
+            box_vogel.prop(v_props, "update_existing")
+
+        if use_custom or v_props.use_icospheres:
+            box_vogel.prop(v_props, "use_vertex_instancing")
+
         box_vogel.prop(v_props, "z_offset")
         box_vogel.prop(v_props, "z_factor_curvature")
         box_vogel.operator(VOGEL_OT_Generate.bl_idname, text="Generate Vogel Pattern")
@@ -512,7 +1109,10 @@ class PLANTGEN_PT_MainPanel(bpy.types.Panel):
         if l_props.add_leaves:
             box_lsystem.prop(l_props, "leaf_object")
             box_lsystem.prop(l_props, "leaf_scale")
+            if l_props.leaf_object:
+                box_lsystem.prop(l_props, "make_unique_leaf_mesh")
 
+        box_lsystem.prop(l_props, "update_existing")
         box_lsystem.operator(LSYSTEM_OT_Generate.bl_idname, text="Generate L-System Plant")
 
 